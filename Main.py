@@ -16,6 +16,17 @@ Date: 10/8/2024
 
 import random  # For random number generation (e.g., deciding which player goes first)
 import os      # For interacting with the operating system (e.g., clearing the console)
+import time    # For the lethal solver's time cap
+import math    # For the ladder's rating formulas
+import json    # For saving and loading ladder checkpoints
+import re      # For turning game messages into coverage keys in the fuzzer
+import itertools  # For listing every possible draw in the draw odds calculator
+import collections  # For the bounded logs and discard piles used in endurance mode
+import tracemalloc  # For the allocation snapshots taken in endurance mode
+import threading    # For sharing tracemalloc between endurance games
+import gc           # For freeing garbage before each endurance memory sample
+import sys          # For choosing endurance mode from the command line
+import concurrent.futures  # For running the fuzzer in several worker processes
 
 # Function to clear the console screen
 def clear_console():
@@ -47,6 +58,18 @@ class CreatureCard(Card):
 
     # Overridden play method (polymorphism)
     def play(self, game, player, target=None):
+        # Check the Battlecry target first so a failed play never leaves the creature on the battlefield
+        if 'Battlecry' in self.abilities and self.name == 'Mage Apprentice':
+            if not target:
+                game.output("No target selected for Battlecry.")
+                return False
+            if not (isinstance(target, CreatureCard) or isinstance(target, Player)):
+                game.output("Invalid target.")
+                return False
+            if target.is_stealth:
+                game.output(f"{target.name} cannot be targeted due to Stealth.")
+                return False
+
         self.owner = player
         player.battlefield.append(self)  # Add creature to the battlefield
         game.turn_log.append(f"{player.name} played creature {self.name}.")
@@ -55,27 +78,18 @@ class CreatureCard(Card):
         # Handle 'Battlecry' abilities
         if 'Battlecry' in self.abilities:
             if self.name == 'Mage Apprentice':
-                if target:
-                    if isinstance(target, CreatureCard) or isinstance(target, Player):
-                        if target.is_stealth:
-                            print(f"{target.name} cannot be targeted due to Stealth.")
-                            return False
-                        target.take_damage(1, game)
-                        game.turn_log.append(f"{self.name} deals 1 damage to {target.name} with Battlecry.")
-                        game.game_log.append(f"{self.name} deals 1 damage to {target.name} with Battlecry.")
-                    else:
-                        print("Invalid target.")
-                        return False
-                else:
-                    print("No target selected for Battlecry.")
-                    return False
+                game.queue_damage(target, 1)
+                game.resolve_damage()
+                game.turn_log.append(f"{self.name} deals 1 damage to {target.name} with Battlecry.")
+                game.game_log.append(f"{self.name} deals 1 damage to {target.name} with Battlecry.")
             elif self.name == 'Dragon':
-                # Dragon's Battlecry damages all enemy creatures
-                for creature in self.owner.opponent.battlefield.copy():
+                # Dragon's Battlecry damages all enemy creatures at the same time
+                for creature in self.owner.opponent.battlefield:
                     if not creature.is_stealth:
-                        creature.take_damage(2, game)
+                        game.queue_damage(creature, 2)
                         game.turn_log.append(f"{self.name} deals 2 damage to {creature.name} with Battlecry.")
                         game.game_log.append(f"{self.name} deals 2 damage to {creature.name} with Battlecry.")
+                game.resolve_damage()
 
         # Handle Goblin's ability to boost other Goblins
         if self.name == 'Goblin':
@@ -97,24 +111,22 @@ class CreatureCard(Card):
         game.turn_log.append(f"{self.owner.name}'s {self.name} attacks {target.name}.")
         game.game_log.append(f"{self.owner.name}'s {self.name} attacks {target.name}.")
         self.can_attack = False  # Creature cannot attack again this turn
+        # Combat damage is simultaneous, so the defender always strikes back
+        game.queue_damage(target, self.attack)
         if isinstance(target, CreatureCard):
-            target.take_damage(self.attack, game)
-            if target.health > 0:
-                self.take_damage(target.attack, game)
-        elif isinstance(target, Player):
-            target.take_damage(self.attack, game)
+            game.queue_damage(self, target.attack)
+        game.resolve_damage()
 
+    # Applies damage only; dead creatures are removed later by Game.resolve_damage
     def take_damage(self, amount, game):
         self.health -= amount
         game.turn_log.append(f"{self.name} takes {amount} damage.")
         game.game_log.append(f"{self.name} takes {amount} damage.")
-        if self.health <= 0:
-            self.die(game)
 
+    # Records the death event (removal from the battlefield is done in one compaction step)
     def die(self, game):
         game.turn_log.append(f"{self.owner.name}'s {self.name} has died.")
         game.game_log.append(f"{self.owner.name}'s {self.name} has died.")
-        self.owner.battlefield.remove(self)
 
 # Subclass for spell cards, inherits from Card
 class SpellCard(Card):
@@ -163,6 +175,22 @@ class LinkedList:
             current = current.next
         return None  # Card not found
 
+    # Remove this exact card object (not just any card with the same name)
+    def remove_instance(self, card):
+        current = self.head
+        previous = None
+        while current:
+            if current.card is card:
+                if previous:
+                    previous.next = current.next
+                else:
+                    self.head = current.next
+                self.size -= 1
+                return True
+            previous = current
+            current = current.next
+        return False
+
     def draw(self):
         if self.head is None:
             return None  # No cards to draw
@@ -192,11 +220,11 @@ class Hand:
 
     def display(self, player):
         hand_cards = self.cards.to_list()
-        print(f"\nYour hand (Energy: {player.energy}/{player.max_energy}, Deck: {player.deck.size} cards left):")
+        player.output(f"\nYour hand (Energy: {player.energy}/{player.max_energy}, Deck: {player.deck.size} cards left):")
         for idx, card in enumerate(hand_cards):
-            print(f"{idx + 1}. {card.name} (Cost: {card.energy_cost}) - {card.description}")
+            player.output(f"{idx + 1}. {card.name} (Cost: {card.energy_cost}) - {card.description}")
         if not hand_cards:
-            print("Your hand is empty.")
+            player.output("Your hand is empty.")
 
     def has_playable_card(self, energy):
         for card in self.cards.to_list():
@@ -206,8 +234,9 @@ class Hand:
 
 # Class representing a player
 class Player:
-    def __init__(self, name):
+    def __init__(self, name, output=print):
         self.name = name
+        self.output = output  # Function used to show messages (the owning game's output)
         self.hp = 20
         self.energy = 3
         self.max_energy = 3
@@ -217,53 +246,107 @@ class Player:
         self.discard_pile = []
         self.has_drawn_initial_hand = False
         self.opponent = None  # Reference to the opposing player
+        self.agent = None     # Bot that plays this player's turns (None for a human)
+        self.odds = None      # DrawOdds for the cards still in the deck
         self.is_stealth = False
 
     def draw_card(self):
         card = self.deck.draw()
         if card:
             self.hand.add_card(card)
-            print(f"{self.name} draws {card.name}.")
+            if self.odds:
+                self.odds.card_drawn(card.name)
+            self.output(f"{self.name} draws {card.name}.")
         else:
-            print(f"{self.name}'s deck is empty!")
+            self.output(f"{self.name}'s deck is empty!")
             self.hp = 0
-            print(f"{self.name} has no more cards to draw and loses the game!")
+            self.output(f"{self.name} has no more cards to draw and loses the game!")
 
     def take_damage(self, amount, game):
         self.hp -= amount
         game.turn_log.append(f"{self.name} takes {amount} damage. HP is now {self.hp}.")
         game.game_log.append(f"{self.name} takes {amount} damage. HP is now {self.hp}.")
 
-# Class representing the game
+# Class representing the game (randomness, I/O and the clock are injected so games can run in parallel threads)
 class Game:
-    def __init__(self):
+    def __init__(self, rng=None, input_func=input, output_func=print, clear_func=clear_console, clock=time.monotonic):
+        self.rng = rng if rng is not None else random.Random()  # Private RNG instead of the shared random module
+        self.input = input_func
+        self.output = output_func
+        self.clear = clear_func
+        self.clock = clock
         self.players = []
         self.current_turn = 0
         self.turn_log = []
         self.game_log = []
+        self.pending_damage = []  # Queue of (target, amount) damage events waiting to be resolved
+        self.winner = None        # Winning player once the game is over (None for a draw)
+        self.turns_played = 0
+        self.max_turns = None     # Stop the game with no winner after this many turns (None for no limit)
+
+    # Queue a damage event so simultaneous damage (AoE, combat, spells) is applied together
+    def queue_damage(self, target, amount):
+        self.pending_damage.append((target, amount))
+
+    # Apply all queued damage in one pass, then remove dead creatures in one compaction step
+    def resolve_damage(self):
+        events = self.pending_damage
+        self.pending_damage = []
+        affected_players = []
+        for target, amount in events:
+            target.take_damage(amount, self)
+            if isinstance(target, CreatureCard) and target.owner not in affected_players:
+                affected_players.append(target.owner)
+        for player in affected_players:
+            self.remove_dead_creatures(player)
+
+    # Rebuild the battlefield without dead creatures, logging deaths in board order
+    def remove_dead_creatures(self, player):
+        survivors = []
+        for creature in player.battlefield:
+            if creature.health > 0:
+                survivors.append(creature)
+            else:
+                creature.die(self)
+        player.battlefield[:] = survivors
 
     def start_game(self):
-        clear_console()
-        print("Welcome to the Python Card Game!")
-        player1_name = input("Enter name for Player 1: ")
-        player2_name = input("Enter name for Player 2: ")
-        player1 = Player(player1_name)
-        player2 = Player(player2_name)
+        self.clear()
+        self.output("Welcome to the Python Card Game!")
+        player1_name = self.input("Enter name for Player 1: ")
+        player2_name = self.input("Enter name for Player 2: ")
+        player1 = Player(player1_name, self.output)
+        player2 = Player(player2_name, self.output)
+        player1.opponent = player2
+        player2.opponent = player1
+        self.players = [player1, player2]
+        self.setup_players()
+        self.current_turn = self.rng.randint(0, 1)  # Randomly select starting player
+        self.output(f"{self.players[self.current_turn].name} will go first.")
+        self.input("Press Enter to start the game...")
+        self.main_game_loop()
+
+    # Start a game between two bots without asking for names; returns the winning player or None
+    def start_bot_game(self, agent1, agent2):
+        player1 = Player(agent1.name, self.output)
+        player2 = Player(agent2.name, self.output)
+        player1.agent = agent1
+        player2.agent = agent2
         player1.opponent = player2
         player2.opponent = player1
         self.players = [player1, player2]
         self.setup_players()
-        self.current_turn = random.randint(0, 1)  # Randomly select starting player
-        print(f"{self.players[self.current_turn].name} will go first.")
-        input("Press Enter to start the game...")
+        self.current_turn = self.rng.randint(0, 1)
         self.main_game_loop()
+        return self.winner
 
     def setup_players(self):
         for player in self.players:
             deck_cards = self.create_deck()
-            random.shuffle(deck_cards)
+            self.rng.shuffle(deck_cards)
             for card in deck_cards:
                 player.deck.add(card)
+            player.odds = DrawOdds(deck_cards)
 
     def create_deck(self):
         deck = []
@@ -379,18 +462,19 @@ class Game:
     def fireball_effect(self, game, player, target):
         if isinstance(target, CreatureCard) or isinstance(target, Player):
             if isinstance(target, CreatureCard) and target.is_stealth:
-                print(f"{target.name} cannot be targeted due to Stealth.")
+                game.output(f"{target.name} cannot be targeted due to Stealth.")
                 return False
-            target.take_damage(5, game)
+            game.queue_damage(target, 5)
+            game.resolve_damage()
             return True
         else:
-            print("Invalid target for Fireball.")
+            game.output("Invalid target for Fireball.")
             return False
 
     def buff_effect(self, game, player, target):
         if isinstance(target, CreatureCard):
             if target.is_stealth:
-                print(f"{target.name} cannot be targeted due to Stealth.")
+                game.output(f"{target.name} cannot be targeted due to Stealth.")
                 return False
             target.attack += 2
             target.health += 2
@@ -398,20 +482,21 @@ class Game:
             game.game_log.append(f"{target.name} gets +2/+2.")
             return True
         else:
-            print("Buff can only target creatures.")
+            game.output("Buff can only target creatures.")
             return False
 
     def curse_effect(self, game, player, target):
         if isinstance(target, CreatureCard):
             if target.is_stealth:
-                print(f"{target.name} cannot be targeted due to Stealth.")
+                game.output(f"{target.name} cannot be targeted due to Stealth.")
                 return False
-            target.take_damage(target.health, game)
+            game.queue_damage(target, target.health)
+            game.resolve_damage()
             game.turn_log.append(f"{target.name} is killed instantly.")
             game.game_log.append(f"{target.name} is killed instantly.")
             return True
         else:
-            print("Curse can only target creatures.")
+            game.output("Curse can only target creatures.")
             return False
 
     def draw_four_effect(self, game, player, target):
@@ -420,18 +505,19 @@ class Game:
                 target.draw_card()
             return True
         else:
-            print("Invalid target for Draw +4.")
+            game.output("Invalid target for Draw +4.")
             return False
 
     def end_game_effect(self, game, player, target):
         if isinstance(target, CreatureCard) or isinstance(target, Player):
             if isinstance(target, CreatureCard) and target.is_stealth:
-                print(f"{target.name} cannot be targeted due to Stealth.")
+                game.output(f"{target.name} cannot be targeted due to Stealth.")
                 return False
-            target.take_damage(20, game)
+            game.queue_damage(target, 20)
+            game.resolve_damage()
             return True
         else:
-            print("Invalid target for End Game.")
+            game.output("Invalid target for End Game.")
             return False
 
     def main_game_loop(self):
@@ -443,40 +529,50 @@ class Game:
             if current_player.hp <= 0 or opponent.hp <= 0:
                 game_over = True
                 break
-            self.player_turn(current_player, opponent)
+            if current_player.agent:
+                current_player.agent.take_turn(self, current_player, opponent)
+            else:
+                self.player_turn(current_player, opponent)
             if current_player.hp <= 0 or opponent.hp <= 0:
                 game_over = True
                 break
             self.end_turn(current_player)
+            if self.max_turns and self.turns_played >= self.max_turns:
+                break
             self.current_turn = 1 - self.current_turn  # Switch turns
         # Determine winner
-        clear_console()
+        self.clear()
         if current_player.hp <= 0 and opponent.hp <= 0:
             result = "It's a draw!"
         elif current_player.hp <= 0:
             result = f"{opponent.name} wins!"
+            self.winner = opponent
         elif opponent.hp <= 0:
             result = f"{current_player.name} wins!"
+            self.winner = current_player
         else:
             result = "Game over!"
-        print(result)
+        self.output(result)
         self.game_log.append(result)  # Add result to game log
-        print("\nGame Log:")
+        self.output("\nGame Log:")
         for entry in self.game_log:
-            print(entry)
+            self.output(entry)
 
     def start_turn(self, player):
-        clear_console()
-        print(f"{player.name}'s turn.")
+        self.clear()
+        self.output(f"{player.name}'s turn.")
         # Draw initial hand if not already done
         if not player.has_drawn_initial_hand:
-            print(f"{player.name} draws their initial hand.")
+            if player.odds:
+                chance = player.odds.chance(player.odds.names_costing(1), 5)
+                self.output(f"Chance of a 1-cost card in the opening hand: {chance:.0%}")
+            self.output(f"{player.name} draws their initial hand.")
             for _ in range(5):
                 player.draw_card()
             player.has_drawn_initial_hand = True
-            input("Press Enter to continue...")
-            clear_console()
-            print(f"{player.name}'s turn.")
+            self.input("Press Enter to continue...")
+            self.clear()
+            self.output(f"{player.name}'s turn.")
         # Increment energy
         if player.max_energy < 7:
             player.max_energy += 1
@@ -489,10 +585,10 @@ class Game:
         player.draw_card()
         # Hand size checks with explanations
         if player.hand.cards.size == 0:
-            print(f"{player.name} has no cards in hand and takes 5 damage.")
+            self.output(f"{player.name} has no cards in hand and takes 5 damage.")
             player.take_damage(5, self)
         elif player.hand.cards.size > 7:
-            print(f"{player.name} has more than 7 cards in hand and takes 5 damage.")
+            self.output(f"{player.name} has more than 7 cards in hand and takes 5 damage.")
             player.take_damage(5, self)
         # Reset can_attack status for creatures without Haste
         for creature in player.battlefield:
@@ -503,19 +599,29 @@ class Game:
 
     def player_turn(self, player, opponent):
         while True:
-            print(f"\n{player.name}'s HP: {player.hp} | Energy: {player.energy}/{player.max_energy}")
-            print(f"{opponent.name}'s HP: {opponent.hp}")
+            self.output(f"\n{player.name}'s HP: {player.hp} | Energy: {player.energy}/{player.max_energy}")
+            self.output(f"{opponent.name}'s HP: {opponent.hp}")
+            if player.odds and player.deck.size:
+                next_energy = min(player.max_energy + 1, 7)
+                supreme = any(c.name == 'Sorcerer Supreme' for c in player.battlefield)
+                chance = player.odds.chance(player.odds.names_costing_at_most(next_energy, supreme), 1)
+                self.output(f"Chance your next draw is playable next turn: {chance:.0%}")
+                draws = player.odds.draws_by_turn(6)
+                if draws and player.odds.counts.get('Dragon'):
+                    self.output(f"Chance to draw a Dragon by turn 6: {player.odds.chance(['Dragon'], draws):.0%}")
             self.display_battlefield()
             player.hand.display(player)
-            print("\nChoose an action:")
-            print("1. Play a card")
-            print("2. Attack")
-            print("3. End turn")
-            print("4. Quit game")
-            choice = input("Enter the number or name of your action: ").strip().lower()
+            self.output("\nChoose an action:")
+            self.output("1. Play a card")
+            self.output("2. Attack")
+            self.output("3. End turn")
+            self.output("4. Quit game")
+            self.output("5. Show lethal")
+            self.output("6. Auto attack")
+            choice = self.input("Enter the number or name of your action: ").strip().lower()
             if choice in ['1', 'play a card']:
                 if not self.can_play_any_card(player):
-                    print("You don't have enough energy to play any card.")
+                    self.output("You don't have enough energy to play any card.")
                     continue
                 self.play_card_action(player, opponent)
                 if player.hp <= 0 or opponent.hp <= 0:
@@ -527,11 +633,43 @@ class Game:
             elif choice in ['3', 'end turn']:
                 break
             elif choice in ['4', 'quit game']:
-                print(f"{player.name} has quit the game.")
+                self.output(f"{player.name} has quit the game.")
                 player.hp = 0
                 break
+            elif choice in ['5', 'show lethal']:
+                self.show_lethal(player, opponent)
+            elif choice in ['6', 'auto attack']:
+                self.auto_attack(player, opponent)
+                if player.hp <= 0 or opponent.hp <= 0:
+                    break
+            else:
+                self.output("Invalid choice. Please try again.")
+
+    # Print the action sequence that wins this turn, if one exists
+    def show_lethal(self, player, opponent):
+        solver = LethalSolver(player, opponent, clock=self.clock)
+        actions = solver.solve()
+        if actions is None:
+            if solver.timed_out:
+                self.output("Could not finish checking for lethal in time.")
             else:
-                print("Invalid choice. Please try again.")
+                self.output("No lethal this turn.")
+            return
+        self.output("Lethal found:")
+        for idx, (kind, card, target) in enumerate(actions):
+            target_name = f" -> {target.name}" if target else ""
+            verb = "Play" if kind == 'play' else "Attack with"
+            self.output(f"{idx + 1}. {verb} {card.name}{target_name}")
+
+    # Attack with every creature following the AttackPlanner's plan for the whole turn
+    def auto_attack(self, player, opponent):
+        plan = AttackPlanner().plan(self, player, opponent)
+        if not plan:
+            self.output("No attacks worth making.")
+            return
+        for action in plan:
+            if self.perform_action(player, action):
+                self.output(f"{action[1].name} attacks {action[2].name}.")
 
     def can_play_any_card(self, player):
         for card in player.hand.cards.to_list():
@@ -545,30 +683,100 @@ class Game:
                 return True
         return False
 
+    # Every action a bot could take right now, as ('play' | 'attack', card, target) tuples
+    def legal_actions(self, player, opponent):
+        actions = []
+        supreme = any(c.name == 'Sorcerer Supreme' for c in player.battlefield)
+        targets = [opponent] + [c for c in opponent.battlefield + player.battlefield if not c.is_stealth]
+        seen = set()
+        for card in player.hand.cards.to_list():
+            if card.name in seen:
+                continue  # Cards with the same name play the same way
+            seen.add(card.name)
+            energy_cost = 0 if supreme and isinstance(card, SpellCard) else card.energy_cost
+            if energy_cost > player.energy:
+                continue
+            if card.name == 'Draw +4':
+                card_targets = [player, opponent]
+            elif card.name in ['Buff', 'Curse']:
+                card_targets = [t for t in targets if isinstance(t, CreatureCard)]
+            elif isinstance(card, SpellCard) or card.name == 'Mage Apprentice':
+                card_targets = targets
+            else:
+                card_targets = [None]
+            for target in card_targets:
+                actions.append(('play', card, target))
+        for creature in player.battlefield:
+            if creature.can_attack:
+                for target in self.attack_targets(opponent):
+                    actions.append(('attack', creature, target))
+        return actions
+
+    # Targets an attacker may choose, following the same Taunt and Stealth rules as handle_attack
+    def attack_targets(self, opponent):
+        taunt_creatures = [c for c in opponent.battlefield if c.is_taunt and not c.is_stealth]
+        if taunt_creatures:
+            return taunt_creatures
+        return [opponent] + [c for c in opponent.battlefield if not c.is_stealth]
+
+    # Carry out one action without prompting; returns True if it happened
+    def perform_action(self, player, action):
+        kind, card, target = action
+        if kind == 'play':
+            return self.play_card(player, card, target)
+        if not card.can_attack or card not in player.battlefield:
+            return False
+        if target not in self.attack_targets(player.opponent):
+            return False
+        card.attack_target(self, target)
+        return True
+
+    # Play a card from the hand the same way play_card_action does, but without prompts
+    def play_card(self, player, card, target):
+        if any(c.name == 'Sorcerer Supreme' for c in player.battlefield) and isinstance(card, SpellCard):
+            energy_cost = 0
+        else:
+            energy_cost = card.energy_cost
+        if player.energy < energy_cost:
+            return False
+        # Creatures can only be targeted while they are on a battlefield
+        if isinstance(target, CreatureCard) and not (target in player.battlefield or target in player.opponent.battlefield):
+            return False
+        if not player.hand.cards.remove_instance(card):
+            return False
+        success = card.play(self, player, target)
+        if success:
+            player.energy -= energy_cost
+            if isinstance(card, SpellCard):
+                player.discard_pile.append(card)
+        else:
+            player.hand.add_card(card)
+        return success
+
     def play_card_action(self, player, opponent):
         if player.hand.cards.size == 0:
-            print("You have no cards to play.")
+            self.output("You have no cards to play.")
             return
         while True:
             hand_cards = player.hand.cards.to_list()
-            print(f"\nYour hand (Energy: {player.energy}/{player.max_energy}, Deck: {player.deck.size} cards left):")
+            self.output(f"\nYour hand (Energy: {player.energy}/{player.max_energy}, Deck: {player.deck.size} cards left):")
             for idx, card in enumerate(hand_cards):
-                print(f"{idx + 1}. {card.name} (Cost: {card.energy_cost}) - {card.description}")
-            card_input = input("Enter the number or name of the card to play (or 'cancel' to go back): ").strip()
+                self.output(f"{idx + 1}. {card.name} (Cost: {card.energy_cost}) - {card.description}")
+            card_input = self.input("Enter the number or name of the card to play (or 'cancel' to go back): ").strip()
             if card_input.lower() == 'cancel':
                 break
-            if card_input.isdigit():
+            if card_input.isdecimal():
                 card_index = int(card_input) - 1
                 if 0 <= card_index < len(hand_cards):
                     card_to_play = hand_cards[card_index]
-                    player.hand.remove_card(card_to_play.name)
+                    player.hand.cards.remove_instance(card_to_play)
                 else:
-                    print("Invalid selection.")
+                    self.output("Invalid selection.")
                     continue
             else:
                 card_to_play = player.hand.remove_card(card_input)
                 if card_to_play is None:
-                    print("You don't have that card in your hand.")
+                    self.output("You don't have that card in your hand.")
                     continue
             # Check for Sorcerer Supreme effect
             if any(c.name == 'Sorcerer Supreme' for c in player.battlefield) and isinstance(card_to_play, SpellCard):
@@ -576,7 +784,7 @@ class Game:
             else:
                 energy_cost = card_to_play.energy_cost
             if player.energy < energy_cost:
-                print("Not enough energy to play that card.")
+                self.output("Not enough energy to play that card.")
                 player.hand.add_card(card_to_play)
                 continue
             target = None
@@ -585,7 +793,7 @@ class Game:
                 if 'Battlecry' in card_to_play.abilities and card_to_play.name == 'Mage Apprentice':
                     target = self.select_target(player, opponent)
                     if target is None:
-                        print("No valid target selected.")
+                        self.output("No valid target selected.")
                         player.hand.add_card(card_to_play)
                         continue
                 success = card_to_play.play(self, player, target)
@@ -593,19 +801,19 @@ class Game:
                     player.energy -= energy_cost
                     break
                 else:
-                    print("Failed to play the card.")
+                    self.output("Failed to play the card.")
                     player.hand.add_card(card_to_play)
             elif isinstance(card_to_play, SpellCard):
                 if card_to_play.name not in ["Draw +4"]:
                     target = self.select_target(player, opponent)
                     if target is None:
-                        print("No valid target selected.")
+                        self.output("No valid target selected.")
                         player.hand.add_card(card_to_play)
                         continue
                 else:
                     target = self.select_player(player, opponent)
                     if target is None:
-                        print("No valid player selected.")
+                        self.output("No valid player selected.")
                         player.hand.add_card(card_to_play)
                         continue
                 success = card_to_play.play(self, player, target)
@@ -614,19 +822,19 @@ class Game:
                     player.discard_pile.append(card_to_play)
                     break
                 else:
-                    print("Failed to play the card.")
+                    self.output("Failed to play the card.")
                     player.hand.add_card(card_to_play)
             else:
-                print("Invalid card type.")
+                self.output("Invalid card type.")
                 player.hand.add_card(card_to_play)
 
     def select_target(self, player, opponent):
         while True:
-            print("Select a target:")
-            print("1. Opponent")
-            print("2. Opponent's creatures")
-            print("3. My creatures")
-            choice = input("Enter the number or name of your choice (or 'cancel' to go back): ").strip().lower()
+            self.output("Select a target:")
+            self.output("1. Opponent")
+            self.output("2. Opponent's creatures")
+            self.output("3. My creatures")
+            choice = self.input("Enter the number or name of your choice (or 'cancel' to go back): ").strip().lower()
             if choice == 'cancel':
                 return None
             if choice in ['1', 'opponent']:
@@ -635,53 +843,53 @@ class Game:
                 available_creatures = [c for c in opponent.battlefield if not c.is_stealth]
                 if available_creatures:
                     for idx, creature in enumerate(available_creatures):
-                        print(f"{idx + 1}. {creature.name} ({creature.attack}/{creature.health})")
-                    idx = input("Enter the number or name of the creature (or 'cancel' to go back): ").strip()
+                        self.output(f"{idx + 1}. {creature.name} ({creature.attack}/{creature.health})")
+                    idx = self.input("Enter the number or name of the creature (or 'cancel' to go back): ").strip()
                     if idx.lower() == 'cancel':
                         continue
-                    if idx.isdigit():
+                    if idx.isdecimal():
                         idx = int(idx) - 1
                         if 0 <= idx < len(available_creatures):
                             return available_creatures[idx]
                         else:
-                            print("Invalid selection.")
+                            self.output("Invalid selection.")
                     else:
                         for creature in available_creatures:
                             if creature.name.lower() == idx.lower():
                                 return creature
-                        print("Invalid selection.")
+                        self.output("Invalid selection.")
                 else:
-                    print("Opponent has no targetable creatures.")
+                    self.output("Opponent has no targetable creatures.")
             elif choice in ['3', 'my creatures']:
                 available_creatures = [c for c in player.battlefield if not c.is_stealth]
                 if available_creatures:
                     for idx, creature in enumerate(available_creatures):
-                        print(f"{idx + 1}. {creature.name} ({creature.attack}/{creature.health})")
-                    idx = input("Enter the number or name of the creature (or 'cancel' to go back): ").strip()
+                        self.output(f"{idx + 1}. {creature.name} ({creature.attack}/{creature.health})")
+                    idx = self.input("Enter the number or name of the creature (or 'cancel' to go back): ").strip()
                     if idx.lower() == 'cancel':
                         continue
-                    if idx.isdigit():
+                    if idx.isdecimal():
                         idx = int(idx) - 1
                         if 0 <= idx < len(available_creatures):
                             return available_creatures[idx]
                         else:
-                            print("Invalid selection.")
+                            self.output("Invalid selection.")
                     else:
                         for creature in available_creatures:
                             if creature.name.lower() == idx.lower():
                                 return creature
-                        print("Invalid selection.")
+                        self.output("Invalid selection.")
                 else:
-                    print("You have no targetable creatures.")
+                    self.output("You have no targetable creatures.")
             else:
-                print("Invalid choice.")
+                self.output("Invalid choice.")
 
     def select_player(self, player, opponent):
         while True:
-            print("Select a player:")
-            print(f"1. {player.name}")
-            print(f"2. {opponent.name}")
-            choice = input("Enter the number or name of your choice (or 'cancel' to go back): ").strip().lower()
+            self.output("Select a player:")
+            self.output(f"1. {player.name}")
+            self.output(f"2. {opponent.name}")
+            choice = self.input("Enter the number or name of your choice (or 'cancel' to go back): ").strip().lower()
             if choice == 'cancel':
                 return None
             if choice in ['1', player.name.lower()]:
@@ -689,28 +897,28 @@ class Game:
             elif choice in ['2', opponent.name.lower()]:
                 return opponent
             else:
-                print("Invalid choice.")
+                self.output("Invalid choice.")
 
     def attack_action(self, player, opponent):
         if not player.battlefield:
-            print("You have no creatures to attack with.")
+            self.output("You have no creatures to attack with.")
             return
         attacking_creatures = [c for c in player.battlefield if c.can_attack]
         if not attacking_creatures:
-            print("No creatures can attack.")
+            self.output("No creatures can attack.")
             return
         while True:
             for idx, creature in enumerate(attacking_creatures):
-                print(f"{idx + 1}. {creature.name} ({creature.attack}/{creature.health})")
-            choice = input("Enter the number or name of the creature to attack with (or 'cancel' to go back): ").strip()
+                self.output(f"{idx + 1}. {creature.name} ({creature.attack}/{creature.health})")
+            choice = self.input("Enter the number or name of the creature to attack with (or 'cancel' to go back): ").strip()
             if choice.lower() == 'cancel':
                 return
-            if choice.isdigit():
+            if choice.isdecimal():
                 idx = int(choice) - 1
                 if 0 <= idx < len(attacking_creatures):
                     attacker = attacking_creatures[idx]
                 else:
-                    print("Invalid selection.")
+                    self.output("Invalid selection.")
                     continue
             else:
                 attacker = None
@@ -719,7 +927,7 @@ class Game:
                         attacker = creature
                         break
                 if attacker is None:
-                    print("Invalid selection.")
+                    self.output("Invalid selection.")
                     continue
             self.handle_attack(attacker, opponent)
             break  # After attack, break out of the loop
@@ -727,22 +935,22 @@ class Game:
     def handle_attack(self, attacker, opponent):
         taunt_creatures = [c for c in opponent.battlefield if c.is_taunt and not c.is_stealth]
         if taunt_creatures:
-            print("Opponent has Taunt creatures. You must attack them first.")
+            self.output("Opponent has Taunt creatures. You must attack them first.")
             available_creatures = taunt_creatures
             if available_creatures:
                 for idx, creature in enumerate(available_creatures):
-                    print(f"{idx + 1}. {creature.name} ({creature.attack}/{creature.health})")
-                choice = input("Enter the number or name of the creature to attack (or 'cancel' to go back): ").strip()
+                    self.output(f"{idx + 1}. {creature.name} ({creature.attack}/{creature.health})")
+                choice = self.input("Enter the number or name of the creature to attack (or 'cancel' to go back): ").strip()
                 if choice.lower() == 'cancel':
                     return
-                if choice.isdigit():
+                if choice.isdecimal():
                     target_idx = int(choice) - 1
                     if 0 <= target_idx < len(available_creatures):
                         target = available_creatures[target_idx]
                         attacker.attack_target(self, target)
                         return
                     else:
-                        print("Invalid selection.")
+                        self.output("Invalid selection.")
                 else:
                     target = None
                     for creature in available_creatures:
@@ -753,17 +961,17 @@ class Game:
                         attacker.attack_target(self, target)
                         return
                     else:
-                        print("Invalid selection.")
+                        self.output("Invalid selection.")
             else:
-                print("All Taunt creatures have Stealth and cannot be targeted.")
+                self.output("All Taunt creatures have Stealth and cannot be targeted.")
                 return
         else:
             # Allow attacking opponent or opponent's creatures
             while True:
-                print("Select target:")
-                print("1. Opponent")
-                print("2. Opponent's creatures")
-                target_choice = input("Enter the number or name of your choice (or 'cancel' to go back): ").strip().lower()
+                self.output("Select target:")
+                self.output("1. Opponent")
+                self.output("2. Opponent's creatures")
+                target_choice = self.input("Enter the number or name of your choice (or 'cancel' to go back): ").strip().lower()
                 if target_choice == 'cancel':
                     return
                 if target_choice in ['1', 'opponent']:
@@ -773,18 +981,18 @@ class Game:
                     available_creatures = [c for c in opponent.battlefield if not c.is_stealth]
                     if available_creatures:
                         for idx, creature in enumerate(available_creatures):
-                            print(f"{idx + 1}. {creature.name} ({creature.attack}/{creature.health})")
-                        choice = input("Enter the number or name of the creature to attack (or 'cancel' to go back): ").strip()
+                            self.output(f"{idx + 1}. {creature.name} ({creature.attack}/{creature.health})")
+                        choice = self.input("Enter the number or name of the creature to attack (or 'cancel' to go back): ").strip()
                         if choice.lower() == 'cancel':
                             continue
-                        if choice.isdigit():
+                        if choice.isdecimal():
                             target_idx = int(choice) - 1
                             if 0 <= target_idx < len(available_creatures):
                                 target = available_creatures[target_idx]
                                 attacker.attack_target(self, target)
                                 return
                             else:
-                                print("Invalid selection.")
+                                self.output("Invalid selection.")
                         else:
                             target = None
                             for creature in available_creatures:
@@ -795,43 +1003,1177 @@ class Game:
                                 attacker.attack_target(self, target)
                                 return
                             else:
-                                print("Invalid selection.")
+                                self.output("Invalid selection.")
                     else:
-                        print("Opponent has no targetable creatures.")
+                        self.output("Opponent has no targetable creatures.")
                 else:
-                    print("Invalid choice.")
+                    self.output("Invalid choice.")
 
     def end_turn(self, player):
-        print(f"{player.name}'s turn has ended.")
-        print("\nTurn Log:")
+        self.turns_played += 1
+        self.output(f"{player.name}'s turn has ended.")
+        self.output("\nTurn Log:")
         for entry in self.turn_log:
-            print(entry)
+            self.output(entry)
         self.turn_log = []
-        input("Press Enter to continue...")
-        clear_console()
+        self.input("Press Enter to continue...")
+        self.clear()
 
     def display_battlefield(self):
-        print("\nBattlefield:")
+        self.output("\nBattlefield:")
         for p in self.players:
-            print(f"{p.name}'s creatures:")
+            self.output(f"{p.name}'s creatures:")
             if p.battlefield:
                 for creature in p.battlefield:
                     status = "Ready" if creature.can_attack else "Exhausted"
                     stealth_status = " (Stealth)" if creature.is_stealth else ""
-                    print(f"- {creature.name} ({creature.attack}/{creature.health}) [{status}]{stealth_status}")
+                    self.output(f"- {creature.name} ({creature.attack}/{creature.health}) [{status}]{stealth_status}")
             else:
-                print("No creatures.")
-        print("")
+                self.output("No creatures.")
+        self.output("")
 
     def display_log(self):
-        print("Game Log:")
+        self.output("Game Log:")
         for entry in self.game_log:
-            print(entry)
+            self.output(entry)
         self.game_log = []
-        input("Press Enter to continue...")
-        clear_console()
+        self.input("Press Enter to continue...")
+        self.clear()
+
+# Exact draw probabilities for the cards left in a deck (the order is unknown, so every order is equally likely).
+# Uses the hypergeometric distribution; results are cached by deck composition, so drawing a card only
+# updates the counts and earlier results stay valid for the next lookup.
+class DrawOdds:
+    def __init__(self, cards, cache_limit=10000):
+        self.counts = {}  # Card name -> copies left in the deck
+        self.costs = {}   # Card name -> energy cost
+        self.spells = set()  # Names of spell cards (free while Sorcerer Supreme is in play)
+        for card in cards:
+            self.counts[card.name] = self.counts.get(card.name, 0) + 1
+            self.costs[card.name] = card.energy_cost
+            if isinstance(card, SpellCard):
+                self.spells.add(card.name)
+        self.size = len(cards)
+        self.drawn = 0  # Cards drawn since the deck was full
+        self.cache = {}
+        self.cache_limit = cache_limit  # The cache is emptied when it gets this big (long games keep adding keys)
+
+    def card_drawn(self, name):
+        if self.counts.get(name, 0) > 0:
+            self.counts[name] -= 1
+            self.size -= 1
+            self.drawn += 1
+
+    def names_costing_at_most(self, energy, spells_free=False):
+        return [name for name, cost in self.costs.items() if cost <= energy or (spells_free and name in self.spells)]
+
+    def names_costing(self, energy):
+        return [name for name, cost in self.costs.items() if cost == energy]
+
+    # Cards still to be drawn from the remaining deck by the start of the player's given turn
+    # (5 opening cards plus one per turn, minus the cards already drawn)
+    def draws_by_turn(self, turn):
+        return max(0, 5 + turn - self.drawn)
+
+    # Chance of drawing at least at_least cards with one of the given names in the next draws cards
+    def chance(self, names, draws, at_least=1):
+        successes = sum(self.counts.get(name, 0) for name in set(names))
+        return self.hypergeometric(self.size, successes, min(draws, self.size), at_least)
+
+    def hypergeometric(self, total, successes, draws, at_least):
+        key = (total, successes, draws, at_least)
+        if key not in self.cache:
+            if len(self.cache) >= self.cache_limit:
+                self.cache.clear()
+            ways = math.comb(total, draws)
+            hits = sum(math.comb(successes, i) * math.comb(total - successes, draws - i)
+                       for i in range(at_least, min(successes, draws) + 1))
+            self.cache[key] = hits / ways if ways else 0.0
+        return self.cache[key]
+
+    # Chance that playing Draw +4 on yourself leads to the more-than-7-cards penalty at your next turn.
+    # Assumes you then play as many cards as possible with the energy you have left (cheapest first),
+    # and sums over every cost mix the four drawn cards can have (multivariate hypergeometric).
+    def draw_four_penalty_chance(self, hand_costs, energy):
+        draws = min(4, self.size)
+        key = ('draw four', tuple(sorted(hand_costs)), energy, draws, tuple(sorted(self.counts.items())))
+        if key in self.cache:
+            return self.cache[key]
+        if len(self.cache) >= self.cache_limit:
+            self.cache.clear()
+        by_cost = {}
+        for name, count in self.counts.items():
+            by_cost[self.costs[name]] = by_cost.get(self.costs[name], 0) + count
+        costs = sorted(by_cost)
+        ways = math.comb(self.size, draws)
+        penalty_ways = 0
+        for drawn in itertools.combinations_with_replacement(costs, draws):
+            combinations = 1
+            for cost in set(drawn):
+                combinations *= math.comb(by_cost[cost], drawn.count(cost))
+            if not combinations:
+                continue
+            budget = energy
+            played = 0
+            for cost in sorted(list(hand_costs) + list(drawn)):
+                if cost > budget:
+                    break
+                budget -= cost
+                played += 1
+            next_turn_hand = len(hand_costs) + draws - played + (1 if self.size > draws else 0)
+            if next_turn_hand > 7:
+                penalty_ways += combinations
+        self.cache[key] = penalty_ways / ways if ways else 0.0
+        return self.cache[key]
+
+# Log that keeps only the newest entries in memory and appends older ones to a file (if a path is given,
+# otherwise they are dropped). The file is emptied when the log is created, so each game gets its own history.
+class BoundedLog:
+    def __init__(self, limit, spill_path=None):
+        self.entries = collections.deque()
+        self.limit = limit
+        self.spill_path = spill_path
+        self.spilled = 0  # Number of entries written to the spill file
+        self.dropped = 0  # Number of entries thrown away because there is no spill file
+        if spill_path:
+            open(spill_path, 'w').close()
+
+    def append(self, entry):
+        self.entries.append(entry)
+        if len(self.entries) > self.limit:
+            # Spill the older half in one write instead of one write per entry
+            old = [self.entries.popleft() for _ in range(len(self.entries) - self.limit // 2)]
+            if self.spill_path:
+                with open(self.spill_path, 'a') as file:
+                    file.write("\n".join(old) + "\n")
+                self.spilled += len(old)
+            else:
+                self.dropped += len(old)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+# Deck for endurance games that builds a fresh shuffled batch of cards as soon as it runs out,
+# so it is never empty and a game can last any number of turns without building every card up front
+class RefillingDeck(LinkedList):
+    def __init__(self, make_cards):
+        super().__init__()
+        self.make_cards = make_cards  # Function returning a new shuffled list of cards
+        self.refill()
+
+    def refill(self):
+        for card in self.make_cards():
+            self.add(card)
+
+    def draw(self):
+        card = super().draw()
+        if self.head is None:
+            self.refill()
+        return card
+
+# Game for endurance tests: refilling decks, capped history, hand and discard pile, and memory tracking with
+# tracemalloc. The traced size is sampled after a garbage collection every sample_every turns (cheap) and a full
+# snapshot listing the top allocation sites is taken every snapshot_every turns, so the report can show per-turn
+# growth. Any of the bots can play; the planner's trade table and the draw-odds cache are bounded for them.
+# tracemalloc traces the whole process: games share it through a count and the last one to finish stops it,
+# so with several games running at once the figures include every game's allocations.
+class EnduranceGame(Game):
+    trace_lock = threading.Lock()
+    trace_users = 0        # Endurance games currently using tracemalloc
+    trace_started = False  # True if an endurance game turned tracing on (and so must turn it off)
+
+    def __init__(self, deck_copies=1, card_names=None, starting_hp=1000000, max_turns=100000, log_limit=1000,
+                 spill_path=None, discard_limit=50, hand_limit=7, sample_every=100, snapshot_every=10000,
+                 top_sites=5, **kwargs):
+        super().__init__(**kwargs)
+        self.deck_copies = deck_copies  # Copies of the normal deck in each refill
+        self.card_names = card_names    # Only keep these cards from the normal deck (None keeps all of them)
+        self.starting_hp = starting_hp
+        self.max_turns = max_turns
+        self.game_log = BoundedLog(log_limit, spill_path)
+        self.discard_limit = discard_limit
+        self.hand_limit = hand_limit    # Cards over this are discarded at the end of each turn
+        self.sample_every = sample_every
+        self.snapshot_every = snapshot_every
+        self.top_sites = top_sites
+        self.samples = []    # (turn, traced bytes)
+        self.snapshots = []  # (turn, top allocation sites since the last snapshot)
+        self.last_snapshot = None
+        self.tracing = False
+
+    # The normal deck (or the chosen cards from it) repeated deck_copies times
+    def create_deck(self):
+        deck = []
+        for _ in range(self.deck_copies):
+            deck += [c for c in super().create_deck() if self.card_names is None or c.name in self.card_names]
+        return deck
+
+    def shuffled_deck(self):
+        deck_cards = self.create_deck()
+        self.rng.shuffle(deck_cards)
+        return deck_cards
+
+    def setup_players(self):
+        self.start_tracing()
+        for player in self.players:
+            player.deck = RefillingDeck(self.shuffled_deck)
+            player.odds = None  # Odds assume a fixed deck, which a refilling deck is not
+            player.hp = self.starting_hp
+            player.discard_pile = collections.deque(maxlen=self.discard_limit)  # Only the newest cards are kept
+
+    def start_tracing(self):
+        with EnduranceGame.trace_lock:
+            if EnduranceGame.trace_users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                EnduranceGame.trace_started = True
+            EnduranceGame.trace_users += 1
+        self.tracing = True
+
+    def stop_tracing(self):
+        if not self.tracing:
+            return
+        self.tracing = False
+        with EnduranceGame.trace_lock:
+            EnduranceGame.trace_users -= 1
+            if EnduranceGame.trace_users == 0 and EnduranceGame.trace_started:
+                tracemalloc.stop()
+                EnduranceGame.trace_started = False
+
+    def main_game_loop(self):
+        self.samples.append((0, self.traced_memory()))
+        self.take_snapshot()
+        try:
+            super().main_game_loop()
+        finally:
+            self.stop_tracing()
+
+    def end_turn(self, player):
+        # Discard the newest cards over the hand limit, so cards that are never played cannot pile up
+        while player.hand.cards.size > self.hand_limit:
+            card = player.hand.cards.draw()
+            player.discard_pile.append(card)
+            self.game_log.append(f"{player.name} discards {card.name} (hand limit).")
+        super().end_turn(player)
+        if self.turns_played % self.sample_every == 0:
+            self.samples.append((self.turns_played, self.traced_memory()))
+        if self.turns_played % self.snapshot_every == 0:
+            self.take_snapshot()
+
+    # Traced bytes still in use. A full collection runs first: it frees reference cycles and empties the
+    # interpreter's free lists, whose memory is still counted at the line that first allocated it.
+    def traced_memory(self):
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0]
+
+    def take_snapshot(self):
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+        top = []
+        if self.last_snapshot:
+            for stat in snapshot.compare_to(self.last_snapshot, 'lineno')[:self.top_sites]:
+                top.append(f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} "
+                           f"{stat.size_diff:+d} bytes ({stat.count_diff:+d} blocks)")
+        self.snapshots.append((self.turns_played, top))
+        self.last_snapshot = snapshot  # Only the newest snapshot is kept
+
+    # Memory at each snapshot with its top allocation sites, and the growth per turn over the whole game.
+    # The first tenth of the samples is skipped as warm-up.
+    def memory_report(self, flat_limit=16):
+        log = self.game_log
+        if log.spill_path:
+            history = f"{log.spilled} log entries spilled to {log.spill_path}"
+        else:
+            history = f"{log.dropped} log entries dropped (no spill file)"
+        lines = [f"Endurance report: {self.turns_played} turns, {history}"]
+        sizes = dict(self.samples)
+        previous_turn = None
+        for turn, top in self.snapshots:
+            line = f"Turn {turn}: {sizes.get(turn, 0) / 1024:.1f} KiB traced"
+            if previous_turn is not None and turn in sizes:
+                growth = (sizes[turn] - sizes[previous_turn]) / max(turn - previous_turn, 1)
+                line += f" ({growth:+.2f} bytes/turn)"
+            lines.append(line)
+            lines += [f"    {site}" for site in top]
+            previous_turn = turn if turn in sizes else previous_turn
+        points = self.samples[len(self.samples) // 10:]
+        if len(points) < 3:
+            lines.append("Not enough samples to measure growth.")
+            return lines
+        # Least-squares slope, so the saw-tooth of the spilling log does not decide the result
+        mean_turn = sum(t for t, _ in points) / len(points)
+        mean_size = sum(s for _, s in points) / len(points)
+        spread = sum((t - mean_turn) ** 2 for t, _ in points)
+        growth = sum((t - mean_turn) * (s - mean_size) for t, s in points) / spread if spread else 0.0
+        verdict = "flat" if abs(growth) <= flat_limit else "GROWING" if growth > 0 else "SHRINKING"
+        lines.append(f"Growth over {len(points)} samples after warm-up: {growth:+.2f} bytes/turn "
+                     f"({verdict}, limit {flat_limit})")
+        return lines
+
+# Exact search for a lethal sequence on the current board.
+# Cards are played first and attacks come last, since playing a card before attacking is never worse.
+# Only the opponent's targetable Taunt creatures matter, because attacking anything else never helps lethal.
+class LethalSolver:
+    def __init__(self, player, opponent, time_limit=1.0, clock=time.monotonic):
+        self.player = player
+        self.opponent = opponent
+        self.time_limit = time_limit
+        self.clock = clock
+        self.deadline = None
+        self.timed_out = False
+        self.failed_states = set()  # Memo of sub-states already known to have no lethal
+
+    # Returns a list of ('play' | 'attack', card, target) actions, or None if no lethal was found
+    def solve(self):
+        self.deadline = self.clock() + self.time_limit
+        self.timed_out = False
+        self.failed_states = set()
+        mine = tuple((c.attack, c.can_attack, c.is_stealth, c) for c in self.player.battlefield)
+        taunts = tuple((c.health, c) for c in self.opponent.battlefield if c.is_taunt and not c.is_stealth)
+        supreme = any(c.name == 'Sorcerer Supreme' for c in self.player.battlefield)
+        state = (self.player.energy, tuple(self.player.hand.cards.to_list()), mine, taunts,
+                 self.opponent.hp, self.opponent.deck.size, supreme)
+        try:
+            return self.search(state)
+        except TimeoutError:
+            self.timed_out = True
+            return None
+
+    def search(self, state):
+        if self.clock() > self.deadline:
+            raise TimeoutError
+        energy, hand, mine, taunts, opp_hp, opp_deck, supreme = state
+        if opp_hp <= 0:
+            return []
+        # Cheap checks first: the memo lookup and the damage bound skip the attack planning below
+        key = (energy, tuple(sorted(c.name for c in hand)), tuple(sorted(m[:3] for m in mine)),
+               tuple(sorted(t[0] for t in taunts)), opp_hp, opp_deck, supreme)
+        if key in self.failed_states:
+            return None
+        if self.upper_bound(state) < opp_hp:
+            self.failed_states.add(key)
+            return None
+        attacks = self.plan_attacks(mine, taunts, opp_hp)
+        if attacks is not None:
+            return attacks
+        tried = set()
+        for idx, card in enumerate(hand):
+            if card.name in tried:
+                continue  # Identical cards lead to identical sub-states
+            tried.add(card.name)
+            cost = 0 if supreme and isinstance(card, SpellCard) else card.energy_cost
+            if cost > energy:
+                continue
+            rest = hand[:idx] + hand[idx + 1:]
+            for target, next_state in self.play_options(card, state, energy - cost, rest):
+                actions = self.search(next_state)
+                if actions is not None:
+                    return [('play', card, target)] + actions
+        self.failed_states.add(key)
+        return None
+
+    # Yield (target, next_state) for every play of card that could matter for lethal
+    def play_options(self, card, state, energy, hand):
+        _, _, mine, taunts, opp_hp, opp_deck, supreme = state
+        opponent = self.opponent
+        # Damage to the opponent's face, or to each distinct Taunt creature (amount None kills it outright)
+        def damage_options(amount):
+            if amount is not None:
+                yield opponent, (energy, hand, mine, taunts, opp_hp - amount, opp_deck, supreme)
+            seen = set()
+            for idx, (health, ref) in enumerate(taunts):
+                if health in seen:
+                    continue
+                seen.add(health)
+                if amount is not None and health > amount:
+                    new_taunts = taunts[:idx] + ((health - amount, ref),) + taunts[idx + 1:]
+                else:
+                    new_taunts = taunts[:idx] + taunts[idx + 1:]
+                yield ref, (energy, hand, mine, new_taunts, opp_hp, opp_deck, supreme)
+
+        if card.name == 'Fireball':
+            yield from damage_options(5)
+        elif card.name == 'End Game':
+            yield from damage_options(20)
+        elif card.name == 'Curse':
+            yield from damage_options(None)
+        elif card.name == 'Draw +4':
+            # Drawing from an empty deck makes the opponent lose the game
+            if opp_deck < 4:
+                yield opponent, (energy, hand, mine, taunts, 0, 0, supreme)
+            else:
+                yield opponent, (energy, hand, mine, taunts, opp_hp, opp_deck - 4, supreme)
+        elif card.name == 'Buff':
+            seen = set()
+            for idx, (attack, ready, stealth, ref) in enumerate(mine):
+                if ready and not stealth and attack not in seen:
+                    seen.add(attack)
+                    new_mine = mine[:idx] + ((attack + 2, ready, stealth, ref),) + mine[idx + 1:]
+                    yield ref, (energy, hand, new_mine, taunts, opp_hp, opp_deck, supreme)
+        elif isinstance(card, CreatureCard):
+            new_mine = mine + ((card.attack, 'Haste' in card.abilities, card.is_stealth, card),)
+            if card.name == 'Goblin':
+                if not any(m[1] and m[3].name == 'Goblin' for m in mine):
+                    return  # Only matters if it boosts a Goblin that can still attack
+                new_mine = tuple((a + 1, r, s, ref) if ref.name == 'Goblin' else (a, r, s, ref)
+                                 for a, r, s, ref in mine) + (new_mine[-1],)
+                yield None, (energy, hand, new_mine, taunts, opp_hp, opp_deck, supreme)
+            elif card.name == 'Mage Apprentice':
+                for target, (_, _, _, new_taunts, new_hp, _, _) in damage_options(1):
+                    yield target, (energy, hand, new_mine, new_taunts, new_hp, opp_deck, supreme)
+            elif card.name == 'Dragon':
+                new_taunts = tuple((h - 2, ref) for h, ref in taunts if h > 2)
+                yield None, (energy, hand, new_mine, new_taunts, opp_hp, opp_deck, supreme)
+            elif card.name == 'Sorcerer Supreme':
+                yield None, (energy, hand, new_mine, taunts, opp_hp, opp_deck, True)
+            elif 'Haste' in card.abilities:
+                yield None, (energy, hand, new_mine, taunts, opp_hp, opp_deck, supreme)
+
+    # Best use of the ready creatures: clear every Taunt, then send the rest to the face
+    def plan_attacks(self, mine, taunts, opp_hp):
+        attackers = sorted((m for m in mine if m[1] and m[0] > 0), key=lambda m: -m[0])
+        # Every point of Taunt health has to be dealt by an attacker before any attack reaches the face
+        if sum(m[0] for m in attackers) - sum(t[0] for t in taunts) < opp_hp:
+            return None
+        result = self.assign_attacks([m[0] for m in attackers], 0, tuple(sorted(t[0] for t in taunts)), {})
+        if result is None or result[0] < opp_hp:
+            return None
+        # Attack the Taunt creatures first, matching each planned health to a live creature
+        actions = []
+        remaining = {ref: health for health, ref in taunts}
+        for i, health in result[1]:
+            if health is None:
+                continue
+            target = next(ref for ref, h in remaining.items() if h == health)
+            remaining[target] -= attackers[i][0]
+            if remaining[target] <= 0:
+                del remaining[target]
+            actions.append(('attack', attackers[i][3], target))
+        for i, health in result[1]:
+            if health is None:
+                actions.append(('attack', attackers[i][3], self.opponent))
+        return actions
+
+    # Returns (face damage, assignments) for attacks[i:] against the remaining Taunt healths.
+    # A method rather than a nested function: a recursive closure is a reference cycle, and the
+    # memo it keeps alive would only be freed by the cyclic garbage collector.
+    def assign_attacks(self, attacks, i, healths, memo):
+        if i == len(attacks):
+            return (0, []) if not healths else None
+        key = (i, healths)
+        if key in memo:
+            return memo[key]
+        attack = attacks[i]
+        # Going face is only allowed once every Taunt is cleared, which the base case enforces
+        best = None
+        result = self.assign_attacks(attacks, i + 1, healths, memo)
+        if result is not None:
+            best = (result[0] + attack, [(i, None)] + result[1])
+        for idx, health in enumerate(healths):
+            if idx > 0 and health == healths[idx - 1]:
+                continue
+            left = healths[:idx] + ((health - attack,) if health > attack else ()) + healths[idx + 1:]
+            result = self.assign_attacks(attacks, i + 1, tuple(sorted(left)), memo)
+            if result is not None and (best is None or result[0] > best[0]):
+                best = (result[0], [(i, health)] + result[1])
+        memo[key] = best
+        return best
+
+    # Optimistic damage estimate used to prune branches that can never reach lethal
+    def upper_bound(self, state):
+        energy, hand, mine, taunts, opp_hp, opp_deck, supreme = state
+        total = sum(m[0] for m in mine if m[1])
+        draw_fours = sum(1 for c in hand if c.name == 'Draw +4')
+        if draw_fours and opp_deck < 4 * draw_fours:
+            return float('inf')
+        free_spells = supreme or (energy >= 7 and any(c.name == 'Sorcerer Supreme' for c in hand))
+        goblins = sum(1 for c in hand if c.name == 'Goblin') + sum(1 for m in mine if m[3].name == 'Goblin')
+        can_buff = any(m[1] for m in mine) or any('Haste' in c.abilities for c in hand if isinstance(c, CreatureCard))
+        items = []
+        burn_items = []  # Damage that can go to the face without getting past Taunt
+        attack_total = total  # Attack available this turn, ignoring energy
+        for card in hand:
+            if card.name == 'Fireball':
+                damage = 5
+            elif card.name == 'End Game':
+                damage = 20
+            elif card.name == 'Mage Apprentice':
+                damage = 1
+            elif card.name == 'Buff':
+                damage = 2 if can_buff else 0
+            elif card.name == 'Goblin':
+                damage = goblins
+            elif isinstance(card, CreatureCard) and 'Haste' in card.abilities:
+                damage = card.attack + goblins
+            else:
+                continue
+            cost = 0 if free_spells and isinstance(card, SpellCard) else card.energy_cost
+            items.append((damage, cost))
+            if card.name in ['Fireball', 'End Game', 'Mage Apprentice']:
+                burn_items.append((damage, cost))
+            else:
+                attack_total += damage
+        total += self.knapsack(items, energy)
+        if not taunts:
+            return total
+        # Taunt health that no Curse, Dragon or burn in hand could remove must be dealt by attackers first
+        names = [c.name for c in hand]
+        healths = sorted((t[0] for t in taunts), reverse=True)[names.count('Curse'):]
+        dragon_damage = 2 * names.count('Dragon')
+        burn = 5 * names.count('Fireball') + 20 * names.count('End Game') + names.count('Mage Apprentice')
+        blocking = max(0, sum(max(0, h - dragon_damage) for h in healths) - burn)
+        return min(total, max(0, attack_total - blocking) + self.knapsack(burn_items, energy))
+
+    # Fractional knapsack over energy is a valid upper bound for the damage of the real plays
+    def knapsack(self, items, energy):
+        total = 0
+        budget = energy
+        for damage, cost in sorted(items, key=lambda item: -item[0] / item[1] if item[1] else float('-inf')):
+            if cost <= budget:
+                total += damage
+                budget -= cost
+            else:
+                total += damage * budget / cost
+                break
+        return total
+
+# Plans the whole attack phase at once instead of choosing one attacker at a time.
+# Every attacker/defender trade is looked up in a table keyed by their stats, and attackers are then
+# matched to targets (a creature, the opponent, or staying back) with the Hungarian algorithm.
+class AttackPlanner:
+    def __init__(self, face_weight=1.0, table_limit=256):
+        self.face_weight = face_weight  # Value of each point of damage to the opponent
+        self.trades = {}  # (attack, health, defender attack, defender health) -> (outcome, value)
+        # Buffs keep creating new stats, so past this size the oldest trade is dropped for each new one
+        # (emptying the whole table would make memory rise and fall in a saw-tooth)
+        self.table_limit = table_limit
+
+    # Outcome of one attack with simultaneous damage, and the board value it gains (or loses)
+    def trade(self, attacker, defender):
+        key = (attacker.attack, attacker.health, defender.attack, defender.health)
+        if key not in self.trades:
+            if len(self.trades) >= self.table_limit:
+                del self.trades[next(iter(self.trades))]
+            kills = attacker.attack >= defender.health
+            dies = defender.attack >= attacker.health
+            if kills and dies:
+                outcome = 'mutual kill'
+            elif kills:
+                outcome = 'kills'
+            elif dies:
+                outcome = 'dies'
+            else:
+                outcome = 'survives'
+            value = (defender.attack + defender.health if kills else 0) - (attacker.attack + attacker.health if dies else 0)
+            self.trades[key] = (outcome, value)
+        return self.trades[key]
+
+    def trade_matrix(self, attackers, defenders):
+        return [[self.trade(a, d) for d in defenders] for a in attackers]
+
+    # Returns the turn's attacks as ('attack', attacker, target) actions, Taunt targets first
+    def plan(self, game, player, opponent):
+        attackers = [c for c in player.battlefield if c.can_attack]
+        if not attackers:
+            return []
+        defenders = [c for c in opponent.battlefield if not c.is_stealth]
+        taunts = [c for c in defenders if c.is_taunt]
+        # Take lethal whenever the attacks alone can reach it
+        mine = tuple((c.attack, True, c.is_stealth, c) for c in attackers)
+        lethal = LethalSolver(player, opponent).plan_attacks(mine, tuple((c.health, c) for c in taunts), opponent.hp)
+        if lethal:
+            return lethal
+        matrix = self.trade_matrix(attackers, defenders)
+        # Columns: each defender once, the opponent once per attacker, and staying back once per attacker
+        columns = defenders + [opponent] * len(attackers) + [None] * len(attackers)
+        scores = []
+        for i, attacker in enumerate(attackers):
+            row = [matrix[i][j][1] for j in range(len(defenders))]
+            row += [attacker.attack * self.face_weight] * len(attackers) + [0] * len(attackers)
+            scores.append(row)
+        if not taunts:
+            return self.to_actions(attackers, columns, solve_assignment(scores), [])
+        # Plan A: kill every Taunt creature (a large bonus forces that), then attack freely
+        bonus = 1000
+        forced = [[score + (bonus if j < len(defenders) and defenders[j].is_taunt and matrix[i][j][0] in
+                            ['kills', 'mutual kill'] else 0) for j, score in enumerate(row)]
+                  for i, row in enumerate(scores)]
+        plan_a = solve_assignment(forced)
+        cleared = sum(1 for i, j in enumerate(plan_a) if j < len(defenders) and defenders[j].is_taunt
+                      and matrix[i][j][0] in ['kills', 'mutual kill'])
+        # Plan B: only Taunt creatures can be attacked, so everything else counts as staying back
+        blocked = [[score if j >= len(columns) - len(attackers) or (j < len(defenders) and defenders[j].is_taunt)
+                    else -bonus for j, score in enumerate(row)] for row in scores]
+        plan_b = solve_assignment(blocked)
+        value_b = sum(blocked[i][j] for i, j in enumerate(plan_b))
+        if cleared == len(taunts) and sum(scores[i][j] for i, j in enumerate(plan_a)) >= value_b:
+            return self.to_actions(attackers, columns, plan_a, taunts)
+        # Plan C: several attackers share a Taunt creature when one each is not enough to clear them all
+        ganged = LethalSolver(player, opponent).plan_attacks(mine, tuple((c.health, c) for c in taunts), 0)
+        if ganged and self.ganged_value(ganged, taunts, opponent) > value_b:
+            return ganged
+        return self.to_actions(attackers, columns, plan_b, taunts)
+
+    # Board value of a plan that clears every Taunt: Taunts killed and face damage, minus attackers lost
+    def ganged_value(self, actions, taunts, opponent):
+        value = sum(t.attack + t.health for t in taunts)
+        for _, attacker, target in actions:
+            if target is opponent:
+                value += attacker.attack * self.face_weight
+            elif target.attack >= attacker.health:
+                value -= attacker.attack + attacker.health
+        return value
+
+    def to_actions(self, attackers, columns, assignment, taunts):
+        actions = [('attack', attackers[i], columns[j]) for i, j in enumerate(assignment) if columns[j] is not None]
+        # Attacks on Taunt creatures must happen before any other attack
+        return sorted(actions, key=lambda action: action[2] not in taunts)
+
+# Hungarian algorithm: picks one column per row (rows <= columns) so the total score is as high as possible
+def solve_assignment(scores):
+    rows = len(scores)
+    cols = len(scores[0])
+    u = [0] * (rows + 1)
+    v = [0] * (cols + 1)
+    match = [0] * (cols + 1)  # Row matched to each column (1-based, 0 means free)
+    way = [0] * (cols + 1)
+    for i in range(1, rows + 1):
+        match[0] = i
+        j0 = 0
+        min_value = [float('inf')] * (cols + 1)
+        used = [False] * (cols + 1)
+        while True:
+            used[j0] = True
+            i0 = match[j0]
+            delta = float('inf')
+            j1 = 0
+            for j in range(1, cols + 1):
+                if not used[j]:
+                    cost = -scores[i0 - 1][j - 1] - u[i0] - v[j]
+                    if cost < min_value[j]:
+                        min_value[j] = cost
+                        way[j] = j0
+                    if min_value[j] < delta:
+                        delta = min_value[j]
+                        j1 = j
+            for j in range(cols + 1):
+                if used[j]:
+                    u[match[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_value[j] -= delta
+            j0 = j1
+            if match[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            match[j0] = match[j1]
+            j0 = j1
+    assignment = [0] * rows
+    for j in range(1, cols + 1):
+        if match[j]:
+            assignment[match[j] - 1] = j - 1
+    return assignment
+
+# Base class for bots; subclasses override choose_action (polymorphism)
+class Agent:
+    def __init__(self, name, rng=None):
+        self.name = name
+        self.rng = rng if rng is not None else random.Random()
+
+    # Play actions until the agent chooses to end the turn or the game is over
+    def take_turn(self, game, player, opponent):
+        while player.hp > 0 and opponent.hp > 0:
+            actions = game.legal_actions(player, opponent)
+            action = self.choose_action(game, player, opponent, actions) if actions else None
+            if action is None or not game.perform_action(player, action):
+                break
+
+    # Return one of actions, or None to end the turn
+    def choose_action(self, game, player, opponent, actions):
+        return None
+
+# Bot that picks a random action (or ends its turn) each step
+class RandomAgent(Agent):
+    def choose_action(self, game, player, opponent, actions):
+        choice = self.rng.randrange(len(actions) + 1)
+        return actions[choice] if choice < len(actions) else None
+
+# Bot that plays its most expensive card first, then attacks following the AttackPlanner
+class GreedyAgent(Agent):
+    def __init__(self, name, rng=None):
+        super().__init__(name, rng)
+        self.planner = AttackPlanner()  # Kept between turns so its trade table is reused
+        self.planned_attacks = []       # Rest of this turn's attack plan
+        self.draw_four_risk = 0.25      # Highest penalty chance accepted for Draw +4 on yourself
+
+    def take_turn(self, game, player, opponent):
+        self.planned_attacks = []
+        super().take_turn(game, player, opponent)
+
+    def choose_action(self, game, player, opponent, actions):
+        plays = [a for a in actions if a[0] == 'play' and self.good_target(player, opponent, a[1], a[2])]
+        if plays:
+            self.planned_attacks = []  # A play can change the board, so the attack plan is made again afterwards
+            return max(plays, key=lambda a: self.play_priority(a[1]) + self.target_score(a[2]))
+        if not any(a[0] == 'attack' for a in actions):
+            return None
+        # The plan covers the whole turn, so it is only made once and then followed
+        if not self.planned_attacks:
+            self.planned_attacks = self.planner.plan(game, player, opponent)
+        if self.planned_attacks:
+            return self.planned_attacks.pop(0)
+        return None
+
+    def play_priority(self, card):
+        return card.energy_cost
+
+    # Small tie-breaker so stronger creatures are buffed or removed first
+    def target_score(self, target):
+        return target.attack / 100 if isinstance(target, CreatureCard) else 0
+
+    def good_target(self, player, opponent, card, target):
+        if card.name == 'Buff':
+            return target.owner is player
+        if card.name == 'Draw +4':
+            # Make the opponent draw when it (with their next turn's draw) empties their deck or overfills their hand
+            if opponent.deck.size < 5 or opponent.hand.cards.size + 5 > 7:
+                return target is opponent
+            return target is player and self.draw_four_safe(player, card)
+
+        if isinstance(target, CreatureCard):
+            return target.owner is opponent
+        return target is None or target is opponent
+
+    # Draw +4 on yourself must leave a card for your next turn's draw and rarely lead to the
+    # more-than-7-cards penalty; without draw odds the hand has to have room even if nothing else is played
+    def draw_four_safe(self, player, card):
+        if player.deck.size < 5:
+            return False
+        if not player.odds:
+            return player.hand.cards.size + 4 <= 7
+        hand_costs = [c.energy_cost for c in player.hand.cards.to_list() if c is not card]
+        supreme = any(c.name == 'Sorcerer Supreme' for c in player.battlefield)
+        energy = player.energy if supreme else player.energy - card.energy_cost
+        return player.odds.draw_four_penalty_chance(hand_costs, energy) <= self.draw_four_risk
+
+# Bot that plays cards in a fixed order of card names, then attacks like GreedyAgent
+class ScriptedAgent(GreedyAgent):
+    def __init__(self, name, priorities, rng=None):
+        super().__init__(name, rng)
+        self.priorities = priorities  # Card names, most wanted first
+
+    def play_priority(self, card):
+        if card.name in self.priorities:
+            return len(self.priorities) - self.priorities.index(card.name)
+        return -1
+
+# Bot that takes lethal when the LethalSolver finds it and plays greedily otherwise
+class SearchAgent(GreedyAgent):
+    def __init__(self, name, rng=None, time_limit=0.05):
+        super().__init__(name, rng)
+        self.time_limit = time_limit
+
+    def choose_action(self, game, player, opponent, actions):
+        lethal = LethalSolver(player, opponent, self.time_limit, game.clock).solve()
+        if lethal:
+            self.planned_attacks = []
+            return lethal[0]
+        return super().choose_action(game, player, opponent, actions)
+
+# Bot for endurance tests that loops Buff and Draw +4, casting Draw +4 on itself when draw_four_safe allows it
+# and on the opponent otherwise, so Draw +4 cards never pile up in its hand.
+# It attacks enemy creatures before the face, so both boards keep trading down in very long games.
+class LoopAgent(GreedyAgent):
+    def choose_action(self, game, player, opponent, actions):
+        plays = []
+        for action in actions:
+            kind, card, target = action
+            if kind != 'play':
+                continue
+            if card.name == 'Buff' and target.owner is player:
+                return action
+            if card.name == 'Draw +4':
+                if (target is player) == self.draw_four_safe(player, card):
+                    return action
+            elif self.good_target(player, opponent, card, target):
+                plays.append(action)
+        if plays:
+            return max(plays, key=lambda a: a[1].energy_cost)
+        attacks = [a for a in actions if a[0] == 'attack']
+        for action in attacks:
+            if action[2] is not opponent:
+                return action
+        return attacks[0] if attacks else None
+
+# Round-robin ladder for bots with incremental Glicko ratings.
+# The next pair played is the unsettled one with the most uncertain rating gap, and a pair stops
+# being scheduled as soon as its gap is larger than z times the combined rating deviation.
+class Ladder:
+    def __init__(self, checkpoint_path=None, rng=None, z=1.96, min_games=10, max_games_per_pair=400,
+                 checkpoint_every=100):
+        self.checkpoint_path = checkpoint_path
+        self.rng = rng if rng is not None else random.Random()
+        self.z = z
+        self.min_games = min_games
+        self.max_games_per_pair = max_games_per_pair
+        self.checkpoint_every = checkpoint_every
+        self.factories = {}  # Agent name -> function(rng) that builds a fresh agent
+        self.ratings = {}    # Agent name -> [rating, rating deviation]
+        self.pairs = {}      # "name1|name2" -> [games played, score of name1]
+        self.games_played = 0
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            self.load()
+
+    def register(self, name, factory):
+        self.factories[name] = factory
+        self.ratings.setdefault(name, [1500.0, 350.0])
+
+    def pair_key(self, name1, name2):
+        return f"{name1}|{name2}" if name1 < name2 else f"{name2}|{name1}"
+
+    def is_settled(self, name1, name2):
+        games = self.pairs.get(self.pair_key(name1, name2), [0, 0.0])[0]
+        if games < self.min_games:
+            return False
+        if games >= self.max_games_per_pair:
+            return True
+        (r1, rd1), (r2, rd2) = self.ratings[name1], self.ratings[name2]
+        return abs(r1 - r2) > self.z * math.sqrt(rd1 ** 2 + rd2 ** 2)
+
+    # Unsettled pair with the largest combined rating deviation, or None when everything is settled
+    def next_pair(self):
+        names = sorted(self.factories)
+        best = None
+        best_rd = -1
+        for i, name1 in enumerate(names):
+            for name2 in names[i + 1:]:
+                if self.is_settled(name1, name2):
+                    continue
+                combined_rd = self.ratings[name1][1] ** 2 + self.ratings[name2][1] ** 2
+                if combined_rd > best_rd or (combined_rd == best_rd and self.rng.random() < 0.5):
+                    best = (name1, name2)
+                    best_rd = combined_rd
+        return best
+
+    # Play one silent game and return name1's score (1 win, 0.5 draw, 0 loss)
+    def play_game(self, name1, name2):
+        seed = self.rng.getrandbits(64)
+        game = Game(rng=random.Random(seed), input_func=lambda prompt='': '',
+                    output_func=lambda *args: None, clear_func=lambda: None)
+        agent1 = self.factories[name1](random.Random(seed + 1))
+        agent2 = self.factories[name2](random.Random(seed + 2))
+        agent1.name, agent2.name = name1, name2
+        winner = game.start_bot_game(agent1, agent2)
+        if winner is None:
+            return 0.5
+        return 1.0 if winner.agent is agent1 else 0.0
+
+    # Glicko update for one game, applied to both players from their pre-game ratings
+    def record_result(self, name1, name2, score):
+        q = math.log(10) / 400
+        old = {name1: self.ratings[name1][:], name2: self.ratings[name2][:]}
+        for me, them, s in [(name1, name2, score), (name2, name1, 1 - score)]:
+            r, rd = old[me]
+            r_them, rd_them = old[them]
+            g = 1 / math.sqrt(1 + 3 * q ** 2 * rd_them ** 2 / math.pi ** 2)
+            expected = 1 / (1 + 10 ** (-g * (r - r_them) / 400))
+            d_squared = 1 / (q ** 2 * g ** 2 * expected * (1 - expected))
+            new_rd = math.sqrt(1 / (1 / rd ** 2 + 1 / d_squared))
+            self.ratings[me] = [r + q * new_rd ** 2 * g * (s - expected), max(new_rd, 30.0)]
+        key = self.pair_key(name1, name2)
+        stats = self.pairs.setdefault(key, [0, 0.0])
+        stats[0] += 1
+        stats[1] += score if key.startswith(name1 + "|") else 1 - score
+        self.games_played += 1
+
+    # Keep playing until every pair is settled or max_games more games have been played
+    def run(self, max_games=None):
+        played = 0
+        while max_games is None or played < max_games:
+            pair = self.next_pair()
+            if pair is None:
+                break
+            self.record_result(pair[0], pair[1], self.play_game(pair[0], pair[1]))
+            played += 1
+            if self.checkpoint_path and self.games_played % self.checkpoint_every == 0:
+                self.save()
+        if self.checkpoint_path:
+            self.save()
+        return self.standings()
+
+    def standings(self):
+        return sorted(((name, r, rd) for name, (r, rd) in self.ratings.items()), key=lambda x: -x[1])
+
+    def save(self):
+        state = {'ratings': self.ratings, 'pairs': self.pairs, 'games_played': self.games_played,
+                 'rng': self.rng.getstate()}
+        temp_path = self.checkpoint_path + ".tmp"
+        with open(temp_path, 'w') as file:
+            json.dump(state, file)
+        os.replace(temp_path, self.checkpoint_path)  # Never leave a half-written checkpoint
+
+    def load(self):
+        with open(self.checkpoint_path) as file:
+            state = json.load(file)
+        self.ratings.update(state['ratings'])
+        self.pairs.update(state['pairs'])
+        self.games_played = state['games_played']
+        version, internal, gauss = state['rng']
+        self.rng.setstate((version, tuple(internal), gauss))
+
+# Raised by the fuzzer when a game breaks one of its invariants
+class InvariantError(Exception):
+    pass
+
+# Raised by the fuzzer's input function when a test case has no inputs left
+class InputExhausted(Exception):
+    pass
+
+# Fuzzer that drives games with random input strings and random bot actions, including invalid ones.
+# Coverage is the set of distinct game messages (numbers and names removed), since every branch of the
+# game reports what it did; test cases that reach new messages are kept and mutated further.
+# One process manages about 800 cases (400 finished games) per second, so reaching thousands per second
+# needs run's workers (one per core); cases_run and games_finished let callers measure the real rate.
+class Fuzzer:
+    vocabulary = ['1', '2', '3', '4', '5', '6', '7', '8', '9', '0', '-1', '99', '', ' ', 'cancel', 'CANCEL',
+                  'play a card', 'attack', 'end turn', 'opponent', "opponent's creatures", 'my creatures',
+                  'Goblin', 'quick archer', 'Knight Defender', 'Mage Apprentice', 'Rogue Assassin', 'Dragon',
+                  'Fireball', 'Buff', 'Curse', 'Draw +4', 'End Game', 'Sorcerer Supreme', 'P1', 'p2',
+                  '1.5', '³', '१', '\x00', '9' * 40, 'quit game']
+
+    def __init__(self, rng=None, max_steps=200):
+        self.rng = rng if rng is not None else random.Random()
+        self.max_steps = max_steps
+        self.coverage = set()
+        self.corpus = []    # (mode, steps) cases that reached new coverage
+        self.failures = []  # (mode, seed, shrunk steps, error message)
+        self.cases_run = 0
+        self.games_finished = 0  # Cases that reached the end of a game instead of running out of steps
+
+    # Invariants that must hold between any two steps of a game.
+    # Walking a whole deck is slow, so list sizes are only recounted in deep checks (at the end of each case).
+    def check_invariants(self, game, deep=False):
+        for player in game.players:
+            for cards in [player.hand.cards, player.deck]:
+                if cards.size < 0 or (deep and cards.size != len(cards.to_list())):
+                    raise InvariantError(f"{player.name} has a LinkedList with a wrong size ({cards.size}).")
+            if not 0 <= player.energy <= player.max_energy <= 7:
+                raise InvariantError(f"{player.name} has energy {player.energy}/{player.max_energy}.")
+            hand = player.hand.cards.to_list() if player.battlefield else []
+            for creature in player.battlefield:
+                if creature.health <= 0:
+                    raise InvariantError(f"Dead {creature.name} is still on the battlefield.")
+                if creature.owner is not player:
+                    raise InvariantError(f"{creature.name} on {player.name}'s battlefield has the wrong owner.")
+                if any(card is creature for card in hand):
+                    raise InvariantError(f"{creature.name} is both in the hand and on the battlefield.")
+
+    # Play one case: 'input' mode answers every prompt, 'action' mode picks bot actions by index
+    def run_case(self, mode, seed, steps):
+        lines = []
+        remaining = iter(steps)
+        game = None
+        record = lines.append  # The game always outputs a single string
+
+        def next_input(prompt=''):
+            self.check_invariants(game)
+            for step in remaining:
+                return step
+            raise InputExhausted
+
+        if mode == 'input':
+            game = Game(rng=random.Random(seed), input_func=next_input, output_func=record, clear_func=lambda: None)
+        else:
+            game = Game(rng=random.Random(seed), input_func=lambda prompt='': '', output_func=record,
+                        clear_func=lambda: None)
+        error = None
+        self.cases_run += 1
+        try:
+            try:
+                if mode == 'input':
+                    game.start_game()
+                else:
+                    agent = FuzzAgent(self, game, remaining)
+                    game.start_bot_game(agent, agent)
+                self.games_finished += 1
+            except InputExhausted:
+                pass
+            self.check_invariants(game, deep=True)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        # Player names come from the inputs, so they are removed along with numbers.
+        # Menus repeat the same lines many times, so each distinct line is only normalised once.
+        names = sorted((p.name for p in game.players if p.name.strip()), key=len, reverse=True)
+        messages = set()
+        for line in set(lines) | set(game.game_log):
+            for name in names:
+                line = line.replace(name, "P")
+            messages.add(re.sub(r"\d+", "#", line))
+        return error, messages
+
+    def random_step(self, mode):
+        if mode == 'input':
+            return self.rng.choice(self.vocabulary)
+        return self.rng.randrange(1000)
+
+    # Insert, delete, replace or splice steps of a case from the corpus
+    def mutate(self, mode, steps):
+        steps = list(steps)
+        for _ in range(self.rng.randint(1, 4)):
+            choice = self.rng.randrange(4)
+            position = self.rng.randint(0, len(steps))
+            if choice == 0 or not steps:
+                steps.insert(position, self.random_step(mode))
+            elif choice == 1:
+                del steps[min(position, len(steps) - 1)]
+            elif choice == 2:
+                steps[min(position, len(steps) - 1)] = self.random_step(mode)
+            else:
+                others = [c[1] for c in self.corpus if c[0] == mode]
+                if others:
+                    other = self.rng.choice(others)
+                    steps = steps[:position] + other[self.rng.randint(0, len(other)):]
+        return steps[:self.max_steps]
+
+    # Delta debugging: drop chunks of steps while the case still fails with the same error type
+    def shrink(self, mode, seed, steps, error):
+        kind = error.split(":")[0]
+
+        def still_fails(candidate):
+            new_error, _ = self.run_case(mode, seed, candidate)
+            return new_error is not None and new_error.split(":")[0] == kind
+
+        chunk = len(steps) // 2
+        while chunk >= 1:
+            i = 0
+            while i < len(steps):
+                candidate = steps[:i] + steps[i + chunk:]
+                if still_fails(candidate):
+                    steps = candidate
+                else:
+                    i += chunk
+            chunk //= 2
+        return steps
+
+    # Run iterations cases, alternating modes; returns the list of shrunk failures found so far.
+    # With several workers the cases are split between processes (Game keeps no global state),
+    # and their failures, corpus and coverage are merged back in.
+    def run(self, iterations, workers=1):
+        if workers > 1:
+            return self.run_parallel(iterations, workers)
+        for i in range(iterations):
+            mode = 'input' if i % 2 == 0 else 'action'
+            seed = self.rng.getrandbits(32)
+            candidates = [c[1] for c in self.corpus if c[0] == mode]
+            if candidates and self.rng.random() < 0.8:
+                steps = self.mutate(mode, self.rng.choice(candidates))
+            else:
+                steps = [self.random_step(mode) for _ in range(self.rng.randint(1, self.max_steps))]
+            error, messages = self.run_case(mode, seed, steps)
+            if error:
+                if not any(f[3].split(":")[0] == error.split(":")[0] for f in self.failures):
+                    self.failures.append((mode, seed, self.shrink(mode, seed, steps, error), error))
+            elif not messages <= self.coverage:
+                self.coverage |= messages
+                self.corpus.append((mode, steps))
+        return self.failures
+
+    def run_parallel(self, iterations, workers):
+        seeds = [self.rng.getrandbits(32) for _ in range(workers)]
+        counts = [iterations // workers + (i < iterations % workers) for i in range(workers)]
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            results = pool.map(fuzz_worker, seeds, counts, [self.max_steps] * workers,
+                               [self.corpus] * workers, [self.coverage] * workers)
+            for failures, corpus, coverage, cases_run, games_finished in results:
+                for failure in failures:
+                    if not any(f[3].split(":")[0] == failure[3].split(":")[0] for f in self.failures):
+                        self.failures.append(failure)
+                self.corpus += corpus
+                self.coverage |= coverage
+                self.cases_run += cases_run
+                self.games_finished += games_finished
+        return self.failures
+
+# Agent used by the fuzzer: each step index picks a legal action or a deliberately invalid one
+# (stealth or dead targets, cards that are not in hand, creatures that cannot attack)
+class FuzzAgent(Agent):
+    def __init__(self, fuzzer, game, steps):
+        super().__init__("Fuzz")
+        self.fuzzer = fuzzer
+        self.game = game
+        self.steps = steps
+        self.graveyard = []  # Creatures that have died, kept around to target them again
+
+    def take_turn(self, game, player, opponent):
+        for step in self.steps:
+            self.fuzzer.check_invariants(game)
+            actions = game.legal_actions(player, opponent)
+            creatures = player.battlefield + opponent.battlefield
+            hand = player.hand.cards.to_list()
+            targeting = [c for c in hand if isinstance(c, SpellCard) or c.name == 'Mage Apprentice']
+            unreachable = [c for c in creatures if c.is_stealth] + self.graveyard
+            deck_cards = []  # The top few cards of the deck (walking the whole deck every step is too slow)
+            node = player.deck.head
+            while node and len(deck_cards) < 3:
+                deck_cards.append(node.card)
+                node = node.next
+            # Actions that may or may not be legal, then actions that must always be rejected
+            actions += [('play', card, None) for card in hand] + [('attack', c, opponent) for c in creatures]
+            first_bad = len(actions)
+            actions += [('play', card, target) for card in targeting for target in unreachable]
+            actions += [('attack', c, t) for c in creatures for t in unreachable + [None, player]]
+            actions += [('play', card, opponent) for card in deck_cards]
+            if step % (len(actions) + 1) == len(actions):
+                return  # End the turn
+            index = step % (len(actions) + 1)
+            if index < first_bad:
+                game.perform_action(player, actions[index])
+            else:
+                self.perform_bad_action(game, player, actions[index])
+            self.graveyard += [c for c in creatures if c.health <= 0 and c not in self.graveyard]
+            if player.hp <= 0 or opponent.hp <= 0:
+                return
+        raise InputExhausted
+
+    # An invalid action must be rejected without spending the card or energy
+    def perform_bad_action(self, game, player, action):
+        before = (player.hand.cards.size, player.energy, len(player.discard_pile), len(player.battlefield))
+        if game.perform_action(player, action):
+            target = action[2].name if action[2] else None
+            raise InvariantError(f"Invalid action {action[0]} {action[1].name} on {target} was accepted.")
+        after = (player.hand.cards.size, player.energy, len(player.discard_pile), len(player.battlefield))
+        if after != before:
+            raise InvariantError(f"Rejected action {action[0]} {action[1].name} changed the game {before} -> {after}.")
+
+# Runs one Fuzzer in a worker process for Fuzzer.run, starting from the caller's corpus and coverage
+def fuzz_worker(seed, iterations, max_steps, corpus, coverage):
+    fuzzer = Fuzzer(random.Random(seed), max_steps)
+    fuzzer.corpus = list(corpus)
+    fuzzer.coverage = set(coverage)
+    fuzzer.run(iterations)
+    return fuzzer.failures, fuzzer.corpus[len(corpus):], fuzzer.coverage, fuzzer.cases_run, fuzzer.games_finished
+
+# Endurance run between two LoopAgents with the default settings, printing the memory report.
+# The log goes to endurance_seed<seed>.log, which is rewritten on every run.
+# Run it with: python Main.py endurance [turns]
+def run_endurance(turns=100000, spill_path=None, seed=0):
+    spill_path = spill_path or f"endurance_seed{seed}.log"
+    game = EnduranceGame(max_turns=turns, spill_path=spill_path, rng=random.Random(seed),
+                         input_func=lambda prompt="": "", output_func=lambda *args: None, clear_func=lambda: None)
+    game.start_bot_game(LoopAgent("Loop 1", random.Random(seed)), LoopAgent("Loop 2", random.Random(seed + 1)))
+    for line in game.memory_report():
+        print(line)
+    return game
 
 # Start the game
 if __name__ == "__main__":
-    game = Game()
-    game.start_game()
+    if len(sys.argv) > 1 and sys.argv[1] == "endurance":
+        run_endurance(int(sys.argv[2]) if len(sys.argv) > 2 else 100000)
+    else:
+        game = Game()
+        game.start_game()